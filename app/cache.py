@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+
+from aiocache import Cache
+from aiocache.serializers import JsonSerializer
+from fastapi import Request
+
+from app.config import REDIS_HOST, REDIS_PORT
+
+logger = logging.getLogger(__name__)
+
+# Общий для всех процессов uvicorn кэш в Redis
+cache = Cache(
+    Cache.REDIS,
+    endpoint=REDIS_HOST,
+    port=REDIS_PORT,
+    namespace="ecommerce",
+    serializer=JsonSerializer(),
+)
+
+# Кэш внутри процесса для редко меняющихся справочников (категории)
+local_cache = Cache(Cache.MEMORY, namespace="ecommerce")
+
+# Время жизни товара в кэше, секунд
+PRODUCT_CACHE_TTL = 300
+
+# Время жизни категории в кэше процесса, секунд: ограничивает устаревание в других процессах
+CATEGORY_CACHE_TTL = 60
+
+# Сколько секунд процесс использует прочитанную версию, не обращаясь к Redis
+VERSION_MEMO_TTL = 1.0
+
+# Версии, прочитанные этим процессом: имя -> (время чтения по time.monotonic, версия)
+_version_memo: dict[str, tuple[float, int]] = {}
+
+
+def product_key(product_id: int, products_version: int) -> str:
+    """
+    Возвращает ключ кэша для товара в текущей версии набора products.
+    После изменения версия растёт, и запись, заполненная по устаревшему чтению, больше не читается.
+    """
+    return f"product:{product_id}:{products_version}"
+
+
+def category_key(category_id: int) -> str:
+    """Возвращает ключ кэша для категории."""
+    return f"category:{category_id}"
+
+
+def version_key(name: str) -> str:
+    """Возвращает ключ счётчика версии набора данных (products, reviews, categories)."""
+    return f"version:{name}"
+
+
+async def cache_get(key: str):
+    """Читает значение из Redis; при недоступности Redis ведёт себя как промах."""
+    try:
+        return await cache.get(key)
+    except Exception:
+        logger.warning("Redis недоступен, чтение %s пропущено", key, exc_info=True)
+        return None
+
+
+async def cache_set(key: str, value, ttl: int) -> None:
+    """Записывает значение в Redis; ошибки Redis только логируются."""
+    try:
+        await cache.set(key, value, ttl=ttl)
+    except Exception:
+        logger.warning("Redis недоступен, запись %s пропущена", key, exc_info=True)
+
+
+async def get_version(name: str) -> int | None:
+    """
+    Возвращает текущую версию набора данных, при отсутствии создаёт её.
+    Возвращает None, если Redis недоступен.
+    """
+    now = time.monotonic()
+    memo = _version_memo.get(name)
+    if memo is not None and now - memo[0] < VERSION_MEMO_TTL:
+        return memo[1]
+    try:
+        version = await cache.get(version_key(name))
+        if version is None:
+            # Начальная версия от времени: после очистки Redis старые ETag не совпадут с новыми
+            version = time.time_ns()
+            await cache.set(version_key(name), version)
+    except Exception:
+        logger.warning("Redis недоступен, версия %s не получена", name, exc_info=True)
+        return None
+    # Пока шёл запрос к Redis, bump_version мог записать более новую версию: версии
+    # только растут, поэтому в памяти остаётся большая из двух
+    memo = _version_memo.get(name)
+    if memo is not None and memo[1] > version:
+        return memo[1]
+    _version_memo[name] = (now, version)
+    return version
+
+
+async def bump_version(*names: str) -> None:
+    """
+    Увеличивает версии наборов данных после изменения, делая их ETag недействительными.
+    Вызывается после commit, поэтому ошибки Redis не пробрасываются: изменение уже сохранено.
+    """
+    for name in names:
+        try:
+            version = await cache.increment(version_key(name))
+            if version == 1:
+                # Ключа не было: начинаем с версии от времени, как и в get_version
+                version = time.time_ns()
+                await cache.set(version_key(name), version)
+        except Exception:
+            logger.warning("Redis недоступен, версия %s не увеличена", name, exc_info=True)
+            _version_memo.pop(name, None)
+            continue
+        # Память обновляется только после инкремента: конкурентный get_version, успевший
+        # прочитать старую версию во время await, не оставит её в памяти процесса
+        _version_memo[name] = (time.monotonic(), version)
+
+
+async def make_etag(*names: str) -> str | None:
+    """
+    Строит слабый ETag из версий наборов данных, от которых зависит ответ.
+    Возвращает None, если версии недоступны: ответ тогда отдаётся без ETag.
+    """
+    versions = await asyncio.gather(*(get_version(name) for name in names))
+    return build_etag(*versions)
+
+
+def build_etag(*versions: int | None) -> str | None:
+    """Строит слабый ETag из уже полученных версий; None, если какая-то версия недоступна."""
+    if None in versions:
+        return None
+    return 'W/"' + "-".join(str(version) for version in versions) + '"'
+
+
+def is_not_modified(request: Request, etag: str | None) -> bool:
+    """Проверяет, совпадает ли If-None-Match клиента с текущим ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if etag is None or if_none_match is None:
+        return False
+    # "*" не поддерживается: ответ 304 отдаётся только на ранее выданный ETag,
+    # иначе он подменил бы 404 для несуществующего ресурса
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def etag_headers(etag: str | None) -> dict[str, str]:
+    """Заголовки кэширования: клиент хранит ответ, но перепроверяет его по ETag."""
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": "no-cache"}
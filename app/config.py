@@ -7,3 +7,9 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
+
+# Строгая загрузка связей для разработки и CI: любая неявная подгрузка relationship падает
+DB_STRICT_LOADING = os.getenv("DB_STRICT_LOADING") == "1"
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
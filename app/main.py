@@ -1,11 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from app.database import async_engine, warm_up_pool
 from app.routers import categories, products, users, reviews
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Прогревает пул соединений при старте и закрывает его при остановке.
+    """
+    await warm_up_pool()
+    yield
+    await async_engine.dispose()
+
+
 # Создаём приложение FastAPI
 app = FastAPI(
     title="FastAPI Интернет-магазин",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Подключаем маршруты категорий
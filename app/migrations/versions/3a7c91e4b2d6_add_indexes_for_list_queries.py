@@ -0,0 +1,44 @@
+"""Add indexes for list queries
+
+Revision ID: 3a7c91e4b2d6
+Revises: bfc6c671bb9f
+Create Date: 2026-10-14 12:10:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c91e4b2d6'
+down_revision: Union[str, Sequence[str], None] = 'bfc6c671bb9f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_active_id', 'products', ['id'], unique=False,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_products_seller_id', 'products', ['seller_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_reviews_active_id', 'reviews', ['id'], unique=False,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_reviews_product_active', 'reviews', ['product_id'], unique=False,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_product_active', table_name='reviews', postgresql_concurrently=True)
+        op.drop_index('ix_reviews_active_id', table_name='reviews', postgresql_concurrently=True)
+        op.drop_index('ix_products_seller_id', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_category_id', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_active_id', table_name='products', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""Replace products active index with covering index
+
+Revision ID: e91b6f3c7d28
+Revises: c5e28d1f9a40
+Create Date: 2026-10-14 15:36:52.441903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91b6f3c7d28'
+down_revision: Union[str, Sequence[str], None] = 'c5e28d1f9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRODUCT_LIST_COLUMNS = ['name', 'description', 'price', 'image_url', 'stock', 'rating', 'category_id', 'is_active']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE/DROP INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_active_cov', 'products', ['id'], unique=False,
+                        postgresql_include=PRODUCT_LIST_COLUMNS,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.drop_index('ix_products_active_id', table_name='products', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_active_id', 'products', ['id'], unique=False,
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.drop_index('ix_products_active_cov', table_name='products', postgresql_concurrently=True)
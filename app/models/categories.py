@@ -3,7 +3,7 @@ from sqlalchemy import String, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 
 
 class CategoryModel(Base):
@@ -17,13 +17,16 @@ class CategoryModel(Base):
     products: Mapped[list["ProductModel"]] = relationship(
         "ProductModel",
         back_populates="category",
+        lazy=RELATIONSHIP_LAZY,
     )
     parent: Mapped[Optional["CategoryModel"]] = relationship(
         "CategoryModel",
         back_populates="children",
         remote_side="CategoryModel.id",
+        lazy=RELATIONSHIP_LAZY,
     )
     children: Mapped[list["CategoryModel"]] = relationship(
         "CategoryModel",
         back_populates="parent",
+        lazy=RELATIONSHIP_LAZY,
     )
\ No newline at end of file
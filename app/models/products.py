@@ -1,12 +1,25 @@
-from sqlalchemy import String, Boolean, Float, Integer
+from sqlalchemy import String, Boolean, Float, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 
 
 class ProductModel(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Покрывающий частичный индекс: список активных товаров читается index-only scan
+        Index(
+            "ix_products_active_cov",
+            "id",
+            postgresql_include=[
+                "name", "description", "price", "image_url", "stock", "rating", "category_id", "is_active",
+            ],
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_seller_id", "seller_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -18,8 +31,11 @@ class ProductModel(Base):
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     rating: Mapped[float] = mapped_column(Float, default=0.0)
+    # Сумма и число активных оценок: рейтинг пересчитывается инкрементально, без AVG по отзывам
+    reviews_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    reviews_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
-    category: Mapped["CategoryModel"] = relationship("CategoryModel", back_populates="products")
-    seller = relationship("UserModel", back_populates="products")
+    category: Mapped["CategoryModel"] = relationship("CategoryModel", back_populates="products", lazy=RELATIONSHIP_LAZY)
+    seller = relationship("UserModel", back_populates="products", lazy=RELATIONSHIP_LAZY)
 
-    reviews: Mapped[list["ReviewModel"]] = relationship("ReviewModel", back_populates="product")
+    reviews: Mapped[list["ReviewModel"]] = relationship("ReviewModel", back_populates="product", lazy=RELATIONSHIP_LAZY)
@@ -1,15 +1,20 @@
 from datetime import datetime
 
-from sqlalchemy import String, Boolean, Float, Integer, Text, DateTime
+from sqlalchemy import String, Boolean, Float, Integer, Text, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 from app.models import UserModel, ProductModel
 
 
 class ReviewModel(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Частичные индексы под списки активных отзывов
+        Index("ix_reviews_active_id", "id", postgresql_where=text("is_active")),
+        Index("ix_reviews_product_active", "product_id", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -20,5 +25,5 @@ class ReviewModel(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
 
-    user: Mapped[UserModel] = relationship("UserModel", back_populates="reviews")
-    product: Mapped[ProductModel] = relationship("ProductModel", back_populates="reviews")
+    user: Mapped[UserModel] = relationship("UserModel", back_populates="reviews", lazy=RELATIONSHIP_LAZY)
+    product: Mapped[ProductModel] = relationship("ProductModel", back_populates="reviews", lazy=RELATIONSHIP_LAZY)
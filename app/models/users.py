@@ -1,7 +1,7 @@
 from sqlalchemy import Boolean, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 
 
 class UserModel(Base):
@@ -13,5 +13,5 @@ class UserModel(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     role: Mapped[str] = mapped_column(String, default="buyer")  # "buyer" or "seller"
 
-    products: Mapped[list["ProductModel"]] = relationship("ProductModel", back_populates="seller")
-    reviews: Mapped[list["ReviewModel"]] = relationship("ReviewModel", back_populates="user")
+    products: Mapped[list["ProductModel"]] = relationship("ProductModel", back_populates="seller", lazy=RELATIONSHIP_LAZY)
+    reviews: Mapped[list["ReviewModel"]] = relationship("ReviewModel", back_populates="user", lazy=RELATIONSHIP_LAZY)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
+from sqlalchemy import select, update, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import bump_version, local_cache, category_key, CATEGORY_CACHE_TTL
 from app.db_depends import get_async_db
 from app.models.categories import CategoryModel
 from app.schemas import CategorySchema, CategoryCreateSchema
@@ -12,6 +13,23 @@ router = APIRouter(
     tags=["categories"],
 )
 
+SELECT_CATEGORY_BY_ID = select(CategoryModel).where(CategoryModel.id == bindparam("category_id"))
+
+
+async def get_category(db: AsyncSession, category_id: int) -> dict | None:
+    """
+    Возвращает категорию по ID из кэша процесса, при промахе читает её из БД.
+    Отсутствующие категории не кэшируются.
+    """
+    category = await local_cache.get(category_key(category_id))
+    if category is None:
+        db_category = await db.scalar(SELECT_CATEGORY_BY_ID, {"category_id": category_id})
+        if db_category is None:
+            return None
+        category = CategorySchema.model_validate(db_category).model_dump()
+        await local_cache.set(category_key(category_id), category, ttl=CATEGORY_CACHE_TTL)
+    return category
+
 
 @router.get("/", response_model=list[CategorySchema])
 async def get_all_categories(db: AsyncSession = Depends(get_async_db)):
@@ -43,6 +61,7 @@ async def create_category(category: CategoryCreateSchema, db: AsyncSession = Dep
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
     await db.commit()
+    await bump_version("categories")
     await db.refresh(db_category)
     return db_category
 
@@ -83,6 +102,8 @@ async def update_category(category_id: int, category: CategoryCreateSchema, db:
         .values(**update_data)
     )
     await db.commit()
+    await local_cache.delete(category_key(category_id))
+    await bump_version("categories")
     return db_category
 
 
@@ -106,5 +127,7 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_async
         .values(is_active=False)
     )
     await db.commit()
+    await local_cache.delete(category_key(category_id))
+    await bump_version("categories")
     return db_category
 
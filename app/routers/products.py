@@ -1,13 +1,29 @@
+import asyncio
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update, desc
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, insert, update, desc, and_, literal, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_seller
+from app.cache import (
+    cache_get,
+    cache_set,
+    product_key,
+    PRODUCT_CACHE_TTL,
+    get_version,
+    bump_version,
+    make_etag,
+    build_etag,
+    is_not_modified,
+    etag_headers,
+)
 from app.db_depends import get_async_db
 from app.models import ProductModel, UserModel, ReviewModel
 from app.models.categories import CategoryModel
+from app.routers.categories import get_category
+from app.routers.reviews import REVIEW_COLUMNS
 from app.schemas import ProductSchema, ProductCreateSchema, ReviewSchema
 
 router = APIRouter(
@@ -15,17 +31,43 @@ router = APIRouter(
     tags=["products"],
 )
 
+# Колонки ProductSchema: списки читаются строками Core без сборки ORM-объектов
+PRODUCT_COLUMNS = (
+    ProductModel.id,
+    ProductModel.name,
+    ProductModel.description,
+    ProductModel.price,
+    ProductModel.image_url,
+    ProductModel.stock,
+    ProductModel.rating,
+    ProductModel.category_id,
+    ProductModel.is_active,
+)
+
+# Готовое выражение для промаха кэша в get_product: строится один раз при импорте.
+# LEFT JOIN запрошенной категории за тот же round-trip проверяет и её существование
+SELECT_PRODUCT_WITH_CATEGORY = (
+    select(*PRODUCT_COLUMNS, CategoryModel.id.label("found_category_id"))
+    .outerjoin(CategoryModel, CategoryModel.id == bindparam("category_id"))
+    .where(ProductModel.id == bindparam("product_id"))
+)
+
 
 @router.get("/", response_model=List[ProductSchema])
-async def get_all_products(db: AsyncSession = Depends(get_async_db)):
+async def get_all_products(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Возвращает список всех товаров."""
 
-    products = await db.scalars(
-        select(ProductModel).where(ProductModel.is_active == True).order_by(desc(ProductModel.id))
+    etag = await make_etag("products")
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    products = await db.execute(
+        select(*PRODUCT_COLUMNS).where(ProductModel.is_active == True).order_by(desc(ProductModel.id))
     )
-    products = products.all()
+    products = products.mappings().all()
 
-    return products
+    # Строки уже совпадают с ProductSchema, повторная валидация response_model не нужна
+    return ORJSONResponse([dict(product) for product in products], headers=etag_headers(etag))
 
 
 @router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
@@ -36,87 +78,138 @@ async def create_product(
 ):
     """Создаёт новый товар, привязанный к текущему продавцу (только для 'seller')."""
 
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+    # INSERT ... SELECT ... WHERE EXISTS: проверка категории и вставка одним запросом
+    values = {**product.model_dump(), "seller_id": current_user.id}
+    category_exists = (
+        select(CategoryModel.id)
+        .where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+        .exists()
+    )
+    result = await db.execute(
+        insert(ProductModel)
+        .from_select(
+            list(values),
+            select(
+                *(literal(value, ProductModel.__table__.c[name].type) for name, value in values.items())
+            ).where(category_exists),
+        )
+        .returning(*PRODUCT_COLUMNS)
     )
-    if not category_result.first():
+    db_product = result.mappings().one_or_none()
+    if db_product is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
-
-    db_product = ProductModel(**product.model_dump(), seller_id=current_user.id)
-    db.add(db_product)
     await db.commit()
-    await db.refresh(db_product)
+    await bump_version("products")
 
     return db_product
 
 
 @router.get("/category/{category_id}", response_model=List[ProductSchema], status_code=status.HTTP_200_OK)
-async def get_products_by_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_products_by_category(
+    category_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Возвращает список товаров в указанной категории по её ID."""
 
-    category = await db.scalars(
-        select(CategoryModel).where(
-            CategoryModel.id == category_id,
-            CategoryModel.is_active == True,
+    etag = await make_etag("products", "categories")
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    # LEFT JOIN от категории: одна строка с NULL-товаром, если категория пуста,
+    # и ни одной строки, если категории нет или она неактивна
+    products = await db.execute(
+        select(*PRODUCT_COLUMNS)
+        .select_from(CategoryModel)
+        .outerjoin(
+            ProductModel,
+            and_(ProductModel.category_id == CategoryModel.id, ProductModel.is_active == True),
         )
+        .where(CategoryModel.id == category_id, CategoryModel.is_active == True)
+        .order_by(desc(ProductModel.id))
     )
-    category = category.first()
+    products = products.mappings().all()
 
-    if category is None:
+    if not products:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    products = await db.scalars(
-        select(ProductModel).where(CategoryModel.id == category_id)
-    )
-    products = products.all()
-
-    return products
+    response.headers.update(etag_headers(etag))
+    return [product for product in products if product["id"] is not None]
 
 
 @router.get("/products/{product_id}/reviews/", response_model=List[ReviewSchema], status_code=status.HTTP_200_OK)
-async def get_product_reviews(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product_reviews(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Возвращает все отзывы по конкретному товару."""
 
-    product = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id)
+    etag = await make_etag("products", "reviews")
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    product = await db.scalar(
+        select(ProductModel.id).where(ProductModel.id == product_id)
     )
-    product = product.first()
 
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    reviews = await db.scalars(
-        select(ReviewModel).where(
+    reviews = await db.execute(
+        select(*REVIEW_COLUMNS).where(
             ReviewModel.product_id == product_id,
             ReviewModel.is_active == True,
         ).order_by(desc(ReviewModel.id))
     )
-    reviews = reviews.all()
+    reviews = reviews.mappings().all()
 
+    response.headers.update(etag_headers(etag))
     return reviews
 
 
 @router.get("/{product_id}", response_model=ProductSchema, status_code=status.HTTP_200_OK)
-async def get_product(product_id: int, category_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product(
+    product_id: int,
+    category_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Возвращает детальную информацию о товаре по его ID.
     """
-    product = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id)
-    )
-    product = product.first()
+    # Версия products читается до обращения к БД и входит в ключ кэша товара
+    products_version, categories_version = await asyncio.gather(get_version("products"), get_version("categories"))
+    etag = build_etag(products_version, categories_version)
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
 
-    if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
+    # Без версии (Redis недоступен) кэш товара не используется
+    key = product_key(product_id, products_version) if products_version is not None else None
 
-    category = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == category_id)
-    )
-    category = category.first()
+    product = await cache_get(key) if key is not None else None
 
-    if category is None:
+    if product is None:
+        # Промах: товар и категория проверяются одним запросом, в кэш попадает только ответ 200
+        row = await db.execute(SELECT_PRODUCT_WITH_CATEGORY, {"product_id": product_id, "category_id": category_id})
+        row = row.mappings().first()
+
+        if row is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        if row["found_category_id"] is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+
+        product = ProductSchema.model_validate(row).model_dump()
+        if key is not None:
+            await cache_set(key, product, ttl=PRODUCT_CACHE_TTL)
+    elif await get_category(db, category_id) is None:
+        # Попадание: категория берётся из кэша процесса, в БД идём только при его промахе
         raise HTTPException(status_code=404, detail="Category not found")
 
+    response.headers.update(etag_headers(etag))
     return product
 
 
@@ -130,22 +223,31 @@ async def update_product(
     """
     Обновляет товар, если он принадлежит текущему продавцу (только для 'seller').
     """
-    result = await db.scalars(select(ProductModel).where(ProductModel.id == product_id))
-    db_product = result.first()
-    if not db_product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    if db_product.seller_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only update your own products")
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+    # Проверки владельца и категории встроены в WHERE, новая строка возвращается через RETURNING
+    update_data = product.model_dump(exclude_unset=True)
+    category_exists = (
+        select(CategoryModel.id)
+        .where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+        .exists()
     )
-    if not category_result.first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
-    await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(**product.model_dump())
+    result = await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id == product_id, ProductModel.seller_id == current_user.id, category_exists)
+        .values(**update_data)
+        .returning(*PRODUCT_COLUMNS)
     )
+    db_product = result.mappings().one_or_none()
+    if db_product is None:
+        # UPDATE не затронул строк: выясняем причину отдельным запросом.
+        # Если товар есть и принадлежит продавцу, не прошла проверка категории
+        seller_id = await db.scalar(select(ProductModel.seller_id).where(ProductModel.id == product_id))
+        if seller_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        if seller_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only update your own products")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
     await db.commit()
-    await db.refresh(db_product)  # Для консистентности данных
+    await bump_version("products")
     return db_product
 
 @router.delete("/{product_id}", response_model=ProductSchema)
@@ -157,17 +259,24 @@ async def delete_product(
     """
     Выполняет мягкое удаление товара, если он принадлежит текущему продавцу (только для 'seller').
     """
-    result = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True)
+    result = await db.execute(
+        update(ProductModel)
+        .where(
+            ProductModel.id == product_id,
+            ProductModel.is_active == True,
+            ProductModel.seller_id == current_user.id,
+        )
+        .values(is_active=False)
+        .returning(*PRODUCT_COLUMNS)
     )
-    product = result.first()
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or inactive")
-    if product.seller_id != current_user.id:
+    product = result.mappings().one_or_none()
+    if product is None:
+        seller_id = await db.scalar(
+            select(ProductModel.seller_id).where(ProductModel.id == product_id, ProductModel.is_active == True)
+        )
+        if seller_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or inactive")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only delete your own products")
-    await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(is_active=False)
-    )
     await db.commit()
-    await db.refresh(product)  # Для возврата is_active = False
+    await bump_version("products")
     return product
@@ -1,44 +1,78 @@
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update, desc, func
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, insert, update, desc, func, literal, cast, bindparam, Float
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_seller, get_current_buyer, get_admin
+from app.cache import bump_version, make_etag, is_not_modified, etag_headers
 from app.db_depends import get_async_db
 from app.models import ProductModel, UserModel
 from app.models.reviews import ReviewModel
-from app.schemas import ProductSchema, ProductCreateSchema, ReviewSchema, ReviewCreateSchema
+from app.schemas import ProductSchema, ProductCreateSchema, ReviewSchema, ReviewCreateSchema, ReviewImportSchema
 
 router = APIRouter(
     prefix="/reviews",
     tags=["reviews"],
 )
 
+# Колонки ReviewSchema; этот же набор читает products.get_product_reviews
+REVIEW_COLUMNS = (
+    ReviewModel.id,
+    ReviewModel.user_id,
+    ReviewModel.product_id,
+    ReviewModel.comment,
+    ReviewModel.comment_date,
+    ReviewModel.grade,
+    ReviewModel.is_active,
+)
 
-async def update_product_rating(db: AsyncSession, product_id: int):
-    result = await db.execute(
-        select(func.avg(ReviewModel.grade)).where(
-            ReviewModel.product_id == product_id,
-            ReviewModel.is_active == True
-        )
+
+# Инкрементальный пересчёт рейтинга: параметры product_id, grade_delta, count_delta.
+# Core-выражение по таблице, чтобы его можно было выполнять и для одного товара, и через executemany
+_products = ProductModel.__table__
+_reviews_sum = _products.c.reviews_sum + bindparam("grade_delta")
+_reviews_count = _products.c.reviews_count + bindparam("count_delta")
+UPDATE_PRODUCT_RATING = (
+    update(_products)
+    .where(_products.c.id == bindparam("product_id"))
+    .values(
+        reviews_sum=_reviews_sum,
+        reviews_count=_reviews_count,
+        rating=func.coalesce(cast(_reviews_sum, Float) / func.nullif(_reviews_count, 0), 0.0),
+    )
+)
+
+
+async def update_product_rating(db: AsyncSession, product_id: int, grade_delta: int, count_delta: int):
+    """
+    Инкрементально обновляет сумму и число оценок товара и пересчитывает рейтинг одним UPDATE.
+    Не выполняет commit: транзакцией владеет вызывающий эндпоинт, который
+    фиксирует изменения отзыва и рейтинга одним commit.
+    """
+
+    await db.execute(
+        UPDATE_PRODUCT_RATING,
+        {"product_id": product_id, "grade_delta": grade_delta, "count_delta": count_delta},
     )
-    avg_rating = result.scalar() or 0.0
-    product = await db.get(ProductModel, product_id)
-    product.rating = avg_rating
-    await db.commit()
 
 
 @router.get("/", response_model=List[ReviewSchema])
-async def get_all_reviews(db: AsyncSession = Depends(get_async_db)):
+async def get_all_reviews(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Возвращает список всех отзывов."""
 
-    reviews = await db.scalars(
-        select(ReviewModel).where(ReviewModel.is_active == True).order_by(desc(ReviewModel.id))
+    etag = await make_etag("reviews")
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    reviews = await db.execute(
+        select(*REVIEW_COLUMNS).where(ReviewModel.is_active == True).order_by(desc(ReviewModel.id))
     )
-    reviews = reviews.all()
+    reviews = reviews.mappings().all()
 
-    return reviews
+    return ORJSONResponse([dict(review) for review in reviews], headers=etag_headers(etag))
 
 
 @router.post("/", response_model=ReviewSchema, status_code=status.HTTP_201_CREATED)
@@ -49,26 +83,89 @@ async def create_review(
 ):
     """Создаёт новый отзыв, привязанный к текущему продавцу (только для 'seller')."""
 
-    product_result = await db.scalars(
-        select(ProductModel).where(
-            ProductModel.id == review.product_id,
-            ProductModel.is_active == True,
+    # INSERT ... SELECT ... WHERE EXISTS: проверка товара и вставка одним запросом
+    values = {**review.model_dump(), "user_id": current_user.id}
+    product_exists = (
+        select(ProductModel.id)
+        .where(ProductModel.id == review.product_id, ProductModel.is_active == True)
+        .exists()
+    )
+    result = await db.execute(
+        insert(ReviewModel)
+        .from_select(
+            list(values),
+            select(
+                *(literal(value, ReviewModel.__table__.c[name].type) for name, value in values.items())
+            ).where(product_exists),
         )
+        .returning(*REVIEW_COLUMNS)
     )
-    product = product_result.first()
-    if not product:
+    db_review = result.mappings().one_or_none()
+    if db_review is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product not found or inactive")
 
-    await update_product_rating(db=db, product_id=product.id)
-
-    db_review = ReviewModel(**review.model_dump(), user_id=current_user.id)
-    db.add(db_review)
+    await update_product_rating(db=db, product_id=review.product_id, grade_delta=review.grade, count_delta=1)
     await db.commit()
-    await db.refresh(db_review)
+    await bump_version("reviews", "products")
 
     return db_review
 
 
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def create_reviews_bulk(
+    reviews: List[ReviewImportSchema],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_admin)
+):
+    """Массово импортирует отзывы через COPY и пересчитывает рейтинги товаров (только для 'admin')."""
+
+    if not reviews:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No reviews to import")
+
+    # FOR SHARE: товар не деактивируют, пока импорт не зафиксирован
+    product_ids = {review.product_id for review in reviews}
+    active_product_ids = await db.scalars(
+        select(ProductModel.id)
+        .where(ProductModel.id.in_(product_ids), ProductModel.is_active == True)
+        .with_for_update(read=True)
+    )
+    if set(active_product_ids.all()) != product_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product not found or inactive")
+
+    user_ids = {review.user_id for review in reviews}
+    active_user_ids = await db.scalars(
+        select(UserModel.id).where(UserModel.id.in_(user_ids), UserModel.is_active == True)
+    )
+    if set(active_user_ids.all()) != user_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not found or inactive")
+
+    # COPY обходит значения по умолчанию ORM, поэтому они передаются явно
+    comment_date = datetime.now()
+    records = [
+        (review.user_id, review.product_id, review.comment, comment_date, review.grade, True)
+        for review in reviews
+    ]
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        ReviewModel.__tablename__,
+        records=records,
+        columns=["user_id", "product_id", "comment", "comment_date", "grade", "is_active"],
+    )
+
+    # Один executemany по всем затронутым товарам вместо UPDATE на каждый отзыв
+    deltas = {product_id: {"product_id": product_id, "grade_delta": 0, "count_delta": 0} for product_id in product_ids}
+    for review in reviews:
+        deltas[review.product_id]["grade_delta"] += review.grade
+        deltas[review.product_id]["count_delta"] += 1
+    await db.execute(UPDATE_PRODUCT_RATING, list(deltas.values()))
+    await db.commit()
+
+    await bump_version("reviews", "products")
+
+    return {"message": "Reviews imported", "count": len(records)}
+
+
 @router.delete("/{review_id}")
 async def delete_review(
     review_id: int,
@@ -77,24 +174,19 @@ async def delete_review(
 ):
     """Выполняет мягкое удаление отзыв по ID, устанавливая is_active = False."""
 
-    result = await db.scalars(
-        select(ReviewModel).where(
-            ReviewModel.id == review_id,
-            ReviewModel.is_active == True,
-        )
+    result = await db.execute(
+        update(ReviewModel)
+        .where(ReviewModel.id == review_id, ReviewModel.is_active == True)
+        .values(is_active=False)
+        .returning(ReviewModel.product_id, ReviewModel.grade)
     )
     db_review = result.first()
-    # product_id = select(ProductModel.id).where(ProductModel.id == db_review.product_id).scalar()
 
-    if not db_review:
+    if db_review is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
-    await db.execute(
-        update(ReviewModel)
-        .where(ReviewModel.id == review_id)
-        .values(is_active=False)
-    )
-    await update_product_rating(db=db, product_id=db_review.product_id)
+    await update_product_rating(db=db, product_id=db_review.product_id, grade_delta=-db_review.grade, count_delta=-1)
     await db.commit()
+    await bump_version("reviews", "products")
 
     return {"message": "Review deleted"}
@@ -98,3 +98,11 @@ class ReviewCreateSchema(BaseModel):
     product_id: int = Field(description="ID товара")
     comment: Optional[str] = Field(None, description="Текст отзыва")
     grade: int = Field(ge=1, le=5, description="Оценка")
+
+
+class ReviewImportSchema(ReviewCreateSchema):
+    """
+    Модель отзыва для массового импорта.
+    Автор указывается явно, так как импорт выполняет администратор.
+    """
+    user_id: int = Field(description="ID автора отзыва")
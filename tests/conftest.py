@@ -0,0 +1,133 @@
+import os
+
+# Связи моделей читают флаг при импорте, поэтому он выставляется до импорта приложения
+os.environ.setdefault("DB_STRICT_LOADING", "1")
+
+import httpx
+import pytest
+from aiocache import Cache
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+from sqlalchemy.pool import StaticPool
+
+import app.cache
+from app.auth import get_admin, get_current_buyer
+from app.database import Base
+from app.db_depends import get_async_db
+from app.main import app as fastapi_app
+from app.models import CategoryModel, ProductModel, ReviewModel, UserModel
+
+
+# Оценки отзывов, которыми засеян каждый товар
+SEED_GRADES = (3, 5)
+
+# ID пользователей в порядке их создания в фикстуре engine
+SELLER_ID, BUYER_ID, ADMIN_ID = 1, 2, 3
+
+
+class StrictSession(Session):
+    """Сессия тестов: к ней, а не к глобальному Session, подключается raiseload("*")."""
+
+
+def _raiseload_all(orm_execute_state: ORMExecuteState) -> None:
+    """
+    Добавляет raiseload("*") к каждому ORM SELECT: связи, не загруженные явно
+    через selectinload/joinedload, вызывают ошибку вместо N+1 запросов.
+    """
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def strict_loading():
+    """Подключает raiseload("*") к сессиям тестов на время теста."""
+    event.listen(StrictSession, "do_orm_execute", _raiseload_all)
+    yield
+    event.remove(StrictSession, "do_orm_execute", _raiseload_all)
+
+
+@pytest.fixture
+async def engine(anyio_backend):
+    """
+    SQLite в памяти с тестовыми данными: категория, продавец, покупатель, администратор,
+    три товара и по два отзыва (3 и 5) на каждый. Агрегаты рейтинга засеяны согласованно с отзывами.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        category = CategoryModel(name="Электроника")
+        seller = UserModel(email="seller@example.com", hashed_password="x", role="seller")
+        buyer = UserModel(email="buyer@example.com", hashed_password="x", role="buyer")
+        admin = UserModel(email="admin@example.com", hashed_password="x", role="admin")
+        session.add_all([category, seller, buyer, admin])
+        await session.flush()
+        products = [
+            ProductModel(
+                name=f"Товар {i}",
+                price=10.0 * i,
+                stock=i,
+                category_id=category.id,
+                seller_id=seller.id,
+                reviews_sum=sum(SEED_GRADES),
+                reviews_count=len(SEED_GRADES),
+                rating=sum(SEED_GRADES) / len(SEED_GRADES),
+            )
+            for i in range(1, 4)
+        ]
+        session.add_all(products)
+        await session.flush()
+        session.add_all(
+            ReviewModel(user_id=buyer.id, product_id=product.id, grade=grade)
+            for product in products
+            for grade in SEED_GRADES
+        )
+        await session.commit()
+
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """Список SQL-выражений, отправленных в БД после наполнения тестовыми данными."""
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+async def client(engine, strict_loading, monkeypatch):
+    """
+    HTTP-клиент приложения со строгими сессиями тестовой БД и кэшем в памяти вместо Redis.
+    Покупатель и администратор подставляются вместо проверки JWT.
+    """
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=StrictSession)
+
+    async def override_get_async_db():
+        async with session_maker() as session:
+            yield session
+
+    monkeypatch.setattr(app.cache, "cache", Cache(Cache.MEMORY))
+    monkeypatch.setattr(app.cache, "_version_memo", {})
+    await app.cache.local_cache.clear()
+    fastapi_app.dependency_overrides[get_async_db] = override_get_async_db
+    fastapi_app.dependency_overrides[get_current_buyer] = lambda: UserModel(id=BUYER_ID, role="buyer")
+    fastapi_app.dependency_overrides[get_admin] = lambda: UserModel(id=ADMIN_ID, role="admin")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app), base_url="http://test") as client:
+        yield client
+
+    fastapi_app.dependency_overrides.clear()
@@ -0,0 +1,31 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+# Списки читаются одним запросом; список отзывов товара добавляет проверку самого товара
+MAX_LIST_STATEMENTS = 2
+
+
+async def test_get_all_products_query_count(client, statements):
+    response = await client.get("/products/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert len(statements) <= MAX_LIST_STATEMENTS
+
+
+async def test_get_all_reviews_query_count(client, statements):
+    response = await client.get("/reviews/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+    assert len(statements) <= MAX_LIST_STATEMENTS
+
+
+async def test_get_product_reviews_query_count(client, statements):
+    response = await client.get("/products/products/1/reviews/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert len(statements) <= MAX_LIST_STATEMENTS
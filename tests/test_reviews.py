@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ProductModel
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_rating_state(engine, product_id: int) -> tuple[int, int, float]:
+    """Читает агрегаты рейтинга товара напрямую из БД."""
+    async with AsyncSession(engine) as session:
+        result = await session.execute(
+            select(ProductModel.reviews_sum, ProductModel.reviews_count, ProductModel.rating)
+            .where(ProductModel.id == product_id)
+        )
+        return tuple(result.one())
+
+
+async def test_seeded_rating_matches_reviews(client):
+    response = await client.get("/products/1", params={"category_id": 1})
+
+    assert response.status_code == 200
+    # Товар засеян оценками 3 и 5
+    assert response.json()["rating"] == 4.0
+
+
+async def test_create_review_updates_rating(client, engine):
+    response = await client.post("/reviews/", json={"product_id": 1, "grade": 1})
+
+    assert response.status_code == 201
+    assert await get_rating_state(engine, 1) == (9, 3, 3.0)
+
+    response = await client.get("/products/1", params={"category_id": 1})
+    assert response.json()["rating"] == 3.0
+
+
+async def test_create_review_for_missing_product_keeps_ratings(client, engine):
+    response = await client.post("/reviews/", json={"product_id": 99, "grade": 1})
+
+    assert response.status_code == 400
+    assert await get_rating_state(engine, 1) == (8, 2, 4.0)
+
+
+async def test_delete_review_updates_rating(client, engine):
+    # Отзыв 1 — оценка 3 у товара 1
+    response = await client.delete("/reviews/1")
+
+    assert response.status_code == 200
+    assert await get_rating_state(engine, 1) == (5, 1, 5.0)
+
+    response = await client.get("/products/1", params={"category_id": 1})
+    assert response.json()["rating"] == 5.0
+
+
+async def test_delete_review_twice_counts_once(client, engine):
+    await client.delete("/reviews/1")
+    response = await client.delete("/reviews/1")
+
+    assert response.status_code == 404
+    assert await get_rating_state(engine, 1) == (5, 1, 5.0)
+
+
+async def test_delete_last_reviews_resets_rating(client, engine):
+    await client.delete("/reviews/1")
+    await client.delete("/reviews/2")
+
+    assert await get_rating_state(engine, 1) == (0, 0, 0.0)